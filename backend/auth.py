@@ -21,6 +21,9 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Verified against when the username is unknown so failed logins take the same time
+DUMMY_PASSWORD_HASH = get_password_hash("not-a-real-password")
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
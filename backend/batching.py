@@ -0,0 +1,79 @@
+import asyncio
+from pymongo.errors import BulkWriteError
+
+
+class InsertBatcher:
+    """Collects single-document inserts and writes them with insert_many.
+
+    Callers await `insert()` and get back the inserted _id once the batch
+    containing their document has been written.
+    """
+
+    def __init__(self, collection, max_batch_size: int = 100, max_delay: float = 0.01):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # The sentinel lets the worker flush everything queued before it
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def insert(self, doc: dict):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((doc, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _write(self, batch):
+        docs = [doc for doc, _ in batch]
+        errors = {}
+        try:
+            # insert_many assigns _id on each document before sending
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            for error in exc.details.get("writeErrors", []):
+                errors[error["index"]] = BulkWriteError(
+                    {"writeErrors": [error], "nInserted": 0}
+                )
+        except Exception as exc:
+            errors = {index: exc for index in range(len(batch))}
+
+        for index, (doc, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(doc["_id"])
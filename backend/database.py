@@ -1,13 +1,32 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
 
 # Get the secret URL from Railway's environment
 MONGO_URL = os.getenv("MONGO_URL")
 
-# Initialize the MongoDB client
-client = AsyncIOMotorClient(MONGO_URL)
+# Connection pool sizing (per process)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+
+# Initialize the single shared MongoDB client
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=60000,
+    retryWrites=True,
+    compressors="zstd,zlib",
+)
 db = client.GlobalPulse24
 news_collection = db.get_collection("articles")
+# Read-heavy public listings tolerate slight staleness, so let secondaries serve them
+news_read_collection = db.get_collection(
+    "articles", read_preference=ReadPreference.SECONDARY_PREFERRED
+)
 
 def get_database():
     return db
+
+def get_news_read_collection():
+    return news_read_collection
@@ -1,23 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import List
 from passlib.context import CryptContext
 from bson import ObjectId
+from cachetools import TTLCache
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from database import get_database
-from models import NewsArticleCreate, NewsArticleResponse, Token, TokenData, UserInDB
+from batching import InsertBatcher
+from database import get_database, get_news_read_collection
+from models import NewsArticleCreate, NewsArticleResponse, NewsArticleSummary, Token, TokenData, UserInDB
 from auth import (
     verify_password,
     get_password_hash,
     create_access_token,
     check_admin,
     get_current_user,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    DUMMY_PASSWORD_HASH
 )
+import asyncio
+import hashlib
+import orjson
 import os
+import re
+import uuid
 from fastapi.security import APIKeyHeader
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 app = FastAPI(title="GlobalPulse24 Backend API", version="1.0.0")
 
@@ -30,6 +41,106 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# List endpoints return at most one page and leave the article body out
+MAX_PAGE_SIZE = 100
+# /news/live is public, and each distinct skip is an O(skip) index walk on a cache miss
+MAX_LIVE_SKIP = 1000
+LIST_PROJECTION = {"content": 0}
+# Same fields with _id and timestamp stringified by the server, so the decoded
+# documents hold only JSON-native values and go straight to orjson
+LIVE_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "title": 1,
+    "author": 1,
+    "category": 1,
+    "image_url": 1,
+    "status": 1,
+    "timestamp": {"$dateToString": {"date": "$timestamp", "format": "%Y-%m-%dT%H:%M:%S.%LZ"}},
+}
+
+# 24 hex characters; checked before ObjectId() so bad IDs don't raise
+OBJECT_ID_RE = re.compile(r"[0-9a-fA-F]{24}")
+
+# Serialized /news/live pages keyed by (skip, limit). Concurrent misses on the same
+# key share one in-flight load; the generation drops loads started before an invalidation.
+LIVE_NEWS_CACHE_TTL = 10
+live_news_cache = TTLCache(maxsize=64, ttl=LIVE_NEWS_CACHE_TTL)
+live_news_loads: dict[tuple[int, int], asyncio.Task] = {}
+live_news_generation = 0
+
+async def load_live_news_page(news, skip: int, limit: int):
+    generation = live_news_generation
+    cursor = news.find(
+        {"status": "approved"}, projection=LIVE_PROJECTION, batch_size=limit
+    ).sort("timestamp", -1).skip(skip).limit(limit)
+    articles = await cursor.to_list(length=limit)
+    body = orjson.dumps(articles)
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+    if generation == live_news_generation:
+        live_news_cache[(skip, limit)] = (body, etag)
+    return body, etag
+
+def invalidate_live_news():
+    global live_news_generation
+    live_news_generation += 1
+    live_news_cache.clear()
+    live_news_loads.clear()
+
+# Article submissions are grouped into insert_many calls
+article_batcher = InsertBatcher(get_database()["articles"])
+
+# /admin/payouts reads a summary collection that one worker rebuilds on this interval
+PAYOUTS_REFRESH_SECONDS = int(os.getenv("PAYOUTS_REFRESH_SECONDS", "60"))
+PAYOUTS_PIPELINE = [
+    {"$match": {"status": "approved"}},
+    {"$project": {"author": 1, "_id": 0}},
+    {"$sort": {"author": 1}},
+    {"$group": {"_id": "$author", "count": {"$sum": 1}}}
+]
+payouts_refresh_task: asyncio.Task | None = None
+# Identifies this process when taking the refresh lease, so only one worker rebuilds
+PAYOUTS_LEASE_HOLDER = uuid.uuid4().hex
+
+async def acquire_payouts_lease(db):
+    """Take or renew the payouts refresh lease; False if another worker holds it."""
+    now = datetime.now(timezone.utc)
+    try:
+        await db["leases"].find_one_and_update(
+            {
+                "_id": "payouts_refresh",
+                "$or": [{"expires_at": {"$lte": now}}, {"holder": PAYOUTS_LEASE_HOLDER}]
+            },
+            {"$set": {
+                "holder": PAYOUTS_LEASE_HOLDER,
+                "expires_at": now + timedelta(seconds=PAYOUTS_REFRESH_SECONDS)
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The lease exists and is held by someone else, so the upsert collided with it
+        return False
+    return True
+
+async def refresh_payouts_summary(db):
+    """Rebuild payouts_summary from approved articles via $merge."""
+    pipeline = PAYOUTS_PIPELINE + [
+        {"$merge": {"into": "payouts_summary", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+    await db["articles"].aggregate(pipeline).to_list(length=None)
+    # Drop publishers that no longer have approved articles ($merge never removes)
+    publishers = await db["articles"].distinct("author", {"status": "approved"})
+    await db["payouts_summary"].delete_many({"_id": {"$nin": publishers}})
+
+async def refresh_payouts_periodically(db):
+    while True:
+        try:
+            if await acquire_payouts_lease(db):
+                await refresh_payouts_summary(db)
+        except Exception as exc:
+            print(f"Failed to refresh payouts summary: {exc}")
+        await asyncio.sleep(PAYOUTS_REFRESH_SECONDS)
+
 # Security for new Admin Routes using ADMIN_PASSWORD
 admin_api_key_header = APIKeyHeader(name="X-Admin-Token", auto_error=False)
 
@@ -46,23 +157,66 @@ def verify_admin_password(api_key_header: str = Depends(admin_api_key_header)):
 @app.on_event("startup")
 async def startup_db_client():
     db = get_database()
-    # Check if admin user exists
-    admin_user = await db["users"].find_one({"username": "yash"})
+    # Indexes backing the list, earnings and payout queries. The unique username
+    # index has to exist before the admin upsert below for that to be race-free.
+    await asyncio.gather(
+        db["articles"].create_index([("status", 1), ("timestamp", -1)]),
+        db["articles"].create_index([("status", 1), ("author", 1)]),
+        db["users"].create_index("username", unique=True),
+    )
+
+    # Check if admin user exists; bcrypt only runs when it has to be created
+    admin_user = await db["users"].find_one({"username": "yash"}, projection={"_id": 1})
     if not admin_user:
-        hashed_pw = get_password_hash("admin123")  # Default password for testing
-        await db["users"].insert_one({
-            "username": "yash",
-            "hashed_password": hashed_pw,
-            "role": "admin"
-        })
-        print("Created default admin user: yash / admin123")
+        # Prefer a precomputed hash, otherwise hash off the event loop
+        precomputed_hash = os.getenv("ADMIN_BCRYPT_HASH")
+        hashed_pw = precomputed_hash or await asyncio.to_thread(
+            get_password_hash, "admin123"  # Default password for testing
+        )
+        # With the unique index in place, workers booting together insert at most
+        # one admin; a worker that loses the race gets DuplicateKeyError
+        try:
+            result = await db["users"].update_one(
+                {"username": "yash"},
+                {"$setOnInsert": {"hashed_password": hashed_pw, "role": "admin"}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            result = None
+        if result is not None and result.upserted_id is not None:
+            if precomputed_hash:
+                print("Created default admin user: yash (password from ADMIN_BCRYPT_HASH)")
+            else:
+                print("Created default admin user: yash / admin123")
+
+    article_batcher.start()
+
+    global payouts_refresh_task
+    payouts_refresh_task = asyncio.create_task(refresh_payouts_periodically(db))
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    if payouts_refresh_task is not None:
+        payouts_refresh_task.cancel()
+        try:
+            await payouts_refresh_task
+        except asyncio.CancelledError:
+            pass
+    await article_batcher.stop()
 
 # 2. FIX 404: Create the missing /token endpoint
 @app.post("/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db = Depends(get_database)):
     # Add your logic to check MongoDB for the user here
-    user = await db["users"].find_one({"username": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    user = await db["users"].find_one(
+        {"username": form_data.username},
+        projection={"username": 1, "hashed_password": 1, "role": 1}
+    )
+    # Always run bcrypt so unknown usernames can't be told apart by timing,
+    # and run it off the event loop since it is CPU-bound
+    hashed_password = user["hashed_password"] if user else DUMMY_PASSWORD_HASH
+    password_ok = await asyncio.to_thread(verify_password, form_data.password, hashed_password)
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -80,41 +234,56 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db = Depends(g
 @app.post("/news/submit", response_model=NewsArticleResponse, status_code=status.HTTP_201_CREATED)
 async def submit_news(article: NewsArticleCreate, db = Depends(get_database)):
     """Publisher submits an article. Status defaults to 'pending'."""
-    article_dict = article.model_dump()
-    article_dict["status"] = "pending"
-    article_dict["timestamp"] = article_dict.get("timestamp") # Will be set by model
-    
-    # Motor doesn't validate strictly, so we prepare the document
-    from models import NewsArticleDB
-    db_article = NewsArticleDB(**article_dict)
-    
-    doc = db_article.model_dump()
-    result = await db["articles"].insert_one(doc)
-    doc["id"] = str(result.inserted_id)
+    doc = article.model_dump()
+    doc["status"] = "pending"
+    doc["timestamp"] = datetime.now(timezone.utc)
+    # The batcher's insert_many sets doc["_id"], which the response model maps to `id`
+    await article_batcher.insert(doc)
     return doc
 
-@app.get("/news/live", response_model=List[NewsArticleResponse])
-async def get_live_news(db = Depends(get_database)):
-    """Fetch only 'approved' news for the homepage."""
-    articles = []
-    cursor = db["articles"].find({"status": "approved"}).sort("timestamp", -1)
-    async for document in cursor:
-        document["id"] = str(document["_id"])
-        articles.append(document)
-    return articles
-
-@app.get("/admin/pending", response_model=List[NewsArticleResponse])
+@app.get("/news/live", response_model=List[NewsArticleSummary])
+async def get_live_news(
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, le=MAX_LIVE_SKIP),
+    news = Depends(get_news_read_collection)
+):
+    """Fetch a page of 'approved' news for the homepage."""
+    key = (skip, limit)
+    entry = live_news_cache.get(key)
+    if entry is None:
+        load = live_news_loads.get(key)
+        if load is None:
+            load = live_news_loads[key] = asyncio.create_task(load_live_news_page(news, skip, limit))
+            load.add_done_callback(
+                lambda done: live_news_loads.pop(key) if live_news_loads.get(key) is done else None
+            )
+        # Shielded so one client disconnecting doesn't cancel the load for the others
+        entry = await asyncio.shield(load)
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={LIVE_NEWS_CACHE_TTL}"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/admin/pending", response_model=List[NewsArticleSummary])
 async def get_pending_news(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0),
     is_admin: bool = Depends(verify_admin_password),
     db = Depends(get_database)
 ):
-    """Admin route to fetch all 'pending' news for approval."""
-    articles = []
-    cursor = db["articles"].find({"status": "pending"}).sort("timestamp", -1)
-    async for document in cursor:
-        document["id"] = str(document["_id"])
-        articles.append(document)
-    return articles
+    """Admin route to fetch a page of 'pending' news for approval."""
+    cursor = db["articles"].find(
+        {"status": "pending"}, projection=LIST_PROJECTION, batch_size=limit
+    ).sort("timestamp", -1).skip(skip).limit(limit)
+    articles = await cursor.to_list(length=limit)
+    for document in articles:
+        document["id"] = str(document.pop("_id"))
+    # Returning the response directly skips re-validating our own documents
+    return Response(content=orjson.dumps(articles), media_type="application/json")
 
 @app.put("/admin/approve/{id}", response_model=NewsArticleResponse)
 async def approve_news(
@@ -123,31 +292,30 @@ async def approve_news(
     db = Depends(get_database)
 ):
     """Admin route to approve an article, changing status from 'pending' to 'published'."""
-    try:
-        obj_id = ObjectId(id)
-    except Exception:
+    if not OBJECT_ID_RE.fullmatch(id):
         raise HTTPException(status_code=400, detail="Invalid Article ID")
+    obj_id = ObjectId(id)
 
-    result = await db["articles"].update_one(
+    updated_article = await db["articles"].find_one_and_update(
         {"_id": obj_id},
-        {"$set": {"status": "published"}}
+        {"$set": {"status": "published"}},
+        return_document=ReturnDocument.AFTER
     )
-    
-    if result.modified_count == 0:
-        # Check if it even exists
-        existing = await db["articles"].find_one({"_id": obj_id})
-        if not existing:
-             raise HTTPException(status_code=404, detail="Article not found")
-        # If it exists but wasn't modified, maybe it was already published
-        
-    updated_article = await db["articles"].find_one({"_id": obj_id})
-    updated_article["id"] = str(updated_article["_id"])
-    return updated_article
+    if updated_article is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    invalidate_live_news()
+
+    # model_construct skips the `_id` validator, so convert it here
+    updated_article["id"] = str(updated_article.pop("_id"))
+    return NewsArticleResponse.model_construct(**updated_article)
 
 @app.get("/news/earnings")
 async def get_publisher_earnings(current_user: TokenData = Depends(get_current_user), db = Depends(get_database)):
     """Publishers can see their own earnings based on their articles."""
-    articles = await db["articles"].count_documents({"author": current_user.username, "status": "approved"})
+    articles = await db["articles"].count_documents(
+        {"author": current_user.username, "status": "approved"},
+        hint=[("status", 1), ("author", 1)]
+    )
     # Mock calculation: $50 per approved article
     revenue = articles * 50
     return {"total_revenue": revenue, "approved_articles": articles, "pending_payments": revenue}
@@ -155,11 +323,7 @@ async def get_publisher_earnings(current_user: TokenData = Depends(get_current_u
 @app.get("/admin/payouts")
 async def get_all_payouts(current_admin: TokenData = Depends(check_admin), db = Depends(get_database)):
     """Admin can see all payouts across all publishers."""
-    pipeline = [
-        {"$match": {"status": "approved"}},
-        {"$group": {"_id": "$author", "count": {"$sum": 1}}}
-    ]
-    cursor = db["articles"].aggregate(pipeline)
+    cursor = db["payouts_summary"].find({}, projection={"count": 1}).sort("_id", 1)
     payouts = []
     async for doc in cursor:
         payouts.append({
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Annotated, Optional
 from datetime import datetime, timezone
 
+# Mongo's ObjectId `_id`, exposed to clients as a string `id`
+MongoId = Annotated[str, BeforeValidator(str), Field(validation_alias="_id")]
+
 class NewsArticleCreate(BaseModel):
     title: str
     content: str
@@ -14,7 +17,21 @@ class NewsArticleDB(NewsArticleCreate):
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class NewsArticleResponse(NewsArticleDB):
-    id: str
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: MongoId
+
+class NewsArticleSummary(BaseModel):
+    """List view of an article; the body is left out to keep pages small."""
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: MongoId
+    title: str
+    author: str
+    category: str
+    image_url: Optional[str] = None
+    status: str
+    timestamp: datetime
 
 # Authentication Models
 class Token(BaseModel):